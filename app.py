@@ -1,32 +1,93 @@
 from reportlab.lib.pagesizes import A4
-from flask import Flask, render_template, request, redirect, send_file, session, url_for
+from flask import (
+    Flask,
+    abort,
+    g,
+    has_request_context,
+    jsonify,
+    render_template,
+    request,
+    redirect,
+    send_file,
+    session,
+    url_for,
+)
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import inspect, text
+from jinja2 import FileSystemBytecodeCache
+from markupsafe import Markup
+from sqlalchemy import inspect, text, update
+from sqlalchemy.exc import IntegrityError, InterfaceError, OperationalError
+from sqlalchemy.orm import Session
 from copy import copy
+from datetime import datetime, timedelta, timezone
 import pandas as pd
-from reportlab.platypus import SimpleDocTemplate, Table
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import (
+    Frame,
+    PageTemplate,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+from functools import lru_cache
+import io
+import json
 import os
 import re
+import secrets
+import sqlite3
+import threading
+import time
 
 app = Flask(__name__)
 
 # ===============================
 # DATABASE CONFIG
 # ===============================
+def normalize_database_url(url):
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+
 database_url = os.environ.get("DATABASE_URL")
 
 if database_url:
-    if database_url.startswith("postgres://"):
-        database_url = database_url.replace("postgres://", "postgresql+psycopg://", 1)
-    elif database_url.startswith("postgresql://"):
-        database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
-
-    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+    app.config["SQLALCHEMY_DATABASE_URI"] = normalize_database_url(database_url)
     print("Using PostgreSQL database")
 else:
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///groups.db"
     print("Using SQLite database")
 
+# Optional read-only database (e.g. a PostgreSQL replica) for listings and
+# exports. Writes always go to DATABASE_URL.
+database_read_url = (os.environ.get("DATABASE_READ_URL") or "").strip()
+read_replica_enabled = bool(database_read_url)
+if read_replica_enabled:
+    app.config["SQLALCHEMY_BINDS"] = {"read": normalize_database_url(database_read_url)}
+    print("Using read-only database for listings and exports")
+
+# Local queue that holds validated submissions while the database is down.
+submission_queue_path = os.environ.get("SUBMISSION_QUEUE_PATH") or os.path.join(
+    app.instance_path, "submission_queue.db"
+)
+
+# Errors that mean the database could not be reached, as opposed to a bug.
+DATABASE_UNAVAILABLE_ERRORS = (OperationalError, InterfaceError)
+
+# How long a browser keeps reading from the primary after it wrote something,
+# so a redirect after a submission never shows replica data from before it.
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("DATABASE_READ_LAG_SECONDS") or 10)
+
+# After the read-only database fails a health check, this worker reads from
+# the primary for this long before trying it again.
+READ_REPLICA_RETRY_SECONDS = 30
+
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # If SECRET_KEY is missing or blank, Flask sessions break and admin login returns 500.
@@ -34,8 +95,30 @@ secret_key = (os.environ.get("SECRET_KEY") or "").strip()
 app.config["SECRET_KEY"] = secret_key or "group-project-dev-secret"
 db = SQLAlchemy(app)
 
+# Compiled templates are kept on disk so restarted workers skip recompiling.
+jinja_cache_dir = os.environ.get("JINJA_CACHE_DIR") or os.path.join(app.instance_path, "jinja_cache")
+os.makedirs(jinja_cache_dir, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(jinja_cache_dir)
+
 ADMIN_PASSWORD = "1353"
 MAX_GROUPS_PER_SUBJECT = 26
+SUBMISSION_TOKEN_TTL = timedelta(days=2)
+GROUP_SNAPSHOT_INTERVAL = 50
+FRAGMENT_CACHE_SIZE = 512
+PDF_TABLE_CHUNK_SIZE = 100
+SUBMISSION_QUEUE_MAX_DEPTH = 5000
+SUBMISSION_QUEUE_POLL_SECONDS = 2
+SUBMISSION_QUEUE_LOCK_TIMEOUT = 5
+SUBMISSION_QUEUE_CLAIM_TIMEOUT = 60
+SUBMISSION_QUEUE_DRAIN_PER_REQUEST = 20
+PDF_COLUMN_WIDTHS = [40, 120, 160, 150]
+GROUP_FIELDS = [
+    "topic",
+    "m1_name", "m1_prn",
+    "m2_name", "m2_prn",
+    "m3_name", "m3_prn",
+    "m4_name", "m4_prn",
+]
 DEFAULT_SUBJECT_KEY = "microcontroller-interfacing"
 
 SUBJECTS = [
@@ -112,6 +195,46 @@ class SubjectAccess(db.Model):
 
     subject = db.Column(db.String(100), primary_key=True)
     is_open = db.Column(db.Boolean, nullable=False, default=True)
+    # Bumped in the same transaction as every write to the subject; keys the
+    # rendered fragment cache.
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
+class SubmissionToken(db.Model):
+    __tablename__ = "submission_tokens"
+
+    # One-time token carried by the student form. A row exists only for
+    # submissions that were saved, so a retried POST can be answered with
+    # the original redirect without re-running validation.
+    token = db.Column(db.String(64), primary_key=True)
+    subject = db.Column(db.String(100), nullable=False)
+    group_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class GroupEvent(db.Model):
+    __tablename__ = "group_events"
+
+    # Append-only history of group and access changes. Rows are never updated
+    # or deleted; state at any moment is rebuilt from a snapshot plus events.
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(100), nullable=False, index=True)
+    group_id = db.Column(db.Integer)
+    action = db.Column(db.String(20), nullable=False)
+    actor = db.Column(db.String(20), nullable=False)
+    payload = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+
+class GroupSnapshot(db.Model):
+    __tablename__ = "group_snapshots"
+
+    # Compacted state of one subject after event `last_event_id`.
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(100), nullable=False, index=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 
 def ensure_subject_column():
@@ -128,6 +251,17 @@ def ensure_subject_column():
         )
 
 
+def ensure_subject_access_version_column():
+    columns = [col["name"] for col in inspect(db.engine).get_columns("subject_access")]
+    if "version" in columns:
+        return
+
+    with db.engine.begin() as connection:
+        connection.execute(
+            text("ALTER TABLE subject_access ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        )
+
+
 def migrate_sqlite_drop_topic_unique(connection):
     connection.execute(
         text(
@@ -205,11 +339,44 @@ def ensure_subject_access_rows():
     db.session.commit()
 
 
+def group_to_dict(group):
+    return {field: getattr(group, field) for field in GROUP_FIELDS}
+
+
+def ensure_group_snapshots():
+    # Groups created before the event log existed are only known through a
+    # baseline snapshot, so every subject needs one to start replay from.
+    existing_subjects = {row.subject for row in GroupSnapshot.query.with_entities(GroupSnapshot.subject)}
+    missing_subjects = [
+        subject["key"] for subject in SUBJECTS if subject["key"] not in existing_subjects
+    ]
+    if not missing_subjects:
+        return
+
+    access_map = {row.subject: bool(row.is_open) for row in SubjectAccess.query.all()}
+    for subject_key in missing_subjects:
+        state = {
+            "is_open": access_map.get(subject_key, True),
+            "groups": {
+                str(g.id): group_to_dict(g)
+                for g in Group.query.filter_by(subject=subject_key).order_by(Group.id.asc())
+            },
+        }
+        db.session.add(
+            GroupSnapshot(subject=subject_key, last_event_id=0, payload=json.dumps(state))
+        )
+    db.session.commit()
+
+
 with app.app_context():
-    db.create_all()
+    # Tables are only created on the primary; a read-only replica gets them
+    # through replication.
+    db.create_all(bind_key=None)
     ensure_subject_column()
     ensure_topic_is_not_unique()
+    ensure_subject_access_version_column()
     ensure_subject_access_rows()
+    ensure_group_snapshots()
 
 
 # ===============================
@@ -249,33 +416,666 @@ def get_selected_subject_key():
     return normalize_subject_key(raw_subject)
 
 
+def mark_primary_write():
+    if read_replica_enabled:
+        session["read_primary_until"] = time.time() + READ_YOUR_WRITES_SECONDS
+
+
+def get_read_session():
+    # GET listings and exports read from the replica when one is configured.
+    # POSTs validate against the primary, and so does a browser that wrote
+    # within the last few seconds, so it always sees its own changes.
+    if not read_replica_enabled or not has_request_context() or request.method != "GET":
+        return db.session
+    if session.get("read_primary_until", 0) > time.time():
+        return db.session
+
+    if "read_session" not in g:
+        g.read_session = open_read_session()
+    return g.read_session or db.session
+
+
+read_replica_down_until = 0.0
+
+
+def open_read_session():
+    # Checks the read-only database once per request. If it cannot be
+    # reached, returns None so this request (and this worker, for a while)
+    # falls back to the primary instead of failing.
+    global read_replica_down_until
+    if read_replica_down_until > time.time():
+        return None
+
+    read_session = Session(db.engines["read"])
+    try:
+        read_session.execute(text("SELECT 1"))
+    except DATABASE_UNAVAILABLE_ERRORS:
+        read_session.close()
+        read_replica_down_until = time.time() + READ_REPLICA_RETRY_SECONDS
+        app.logger.warning("Read-only database unavailable, reading from the primary")
+        return None
+    return read_session
+
+
+@app.teardown_appcontext
+def close_read_session(_exception):
+    read_session = g.pop("read_session", None)
+    if read_session is not None:
+        read_session.close()
+
+
 def get_groups_for_subject(subject_key):
-    return Group.query.filter_by(subject=subject_key).order_by(Group.id.asc()).all()
+    return (
+        get_read_session()
+        .query(Group)
+        .filter_by(subject=subject_key)
+        .order_by(Group.id.asc())
+        .all()
+    )
+
+
+def iter_groups_for_subject(subject_key, batch_size):
+    # Streams rows in batches instead of loading the whole subject at once.
+    return (
+        get_read_session()
+        .query(Group)
+        .filter_by(subject=subject_key)
+        .order_by(Group.id.asc())
+        .yield_per(batch_size)
+    )
 
 
 def get_subject_access_map():
     subject_access_map = {subject["key"]: True for subject in SUBJECTS}
-    for row in SubjectAccess.query.all():
+    for row in get_read_session().query(SubjectAccess).all():
         subject_access_map[row.subject] = bool(row.is_open)
     return subject_access_map
 
 
+def new_submission_token():
+    return secrets.token_urlsafe(24)
+
+
+def get_submission_token():
+    token = (request.form.get("submission_token") or "").strip()
+    if not token or len(token) > 64:
+        return None
+    return token
+
+
+def prune_submission_tokens():
+    cutoff = datetime.utcnow() - SUBMISSION_TOKEN_TTL
+    SubmissionToken.query.filter(SubmissionToken.created_at < cutoff).delete(
+        synchronize_session=False
+    )
+
+
+def apply_group_event(state, event):
+    if event.action in ("create", "edit"):
+        state["groups"][str(event.group_id)] = json.loads(event.payload)
+    elif event.action in ("delete", "move_out"):
+        state["groups"].pop(str(event.group_id), None)
+    elif event.action == "open":
+        state["is_open"] = True
+    elif event.action == "close":
+        state["is_open"] = False
+
+
+def get_subject_state(subject_key, at=None):
+    # `at` is a naive UTC datetime. Returns None when `at` is earlier than the
+    # subject's first snapshot, since nothing is known about that time.
+    snapshots = GroupSnapshot.query.filter_by(subject=subject_key)
+    events = GroupEvent.query.filter_by(subject=subject_key)
+    if at is not None:
+        snapshots = snapshots.filter(GroupSnapshot.created_at <= at)
+        events = events.filter(GroupEvent.created_at <= at)
+
+    snapshot = snapshots.order_by(GroupSnapshot.last_event_id.desc()).first()
+    if snapshot is not None:
+        state = json.loads(snapshot.payload)
+        events = events.filter(GroupEvent.id > snapshot.last_event_id)
+    elif at is not None:
+        return None
+    else:
+        state = {"is_open": True, "groups": {}}
+
+    for event in events.order_by(GroupEvent.id.asc()):
+        apply_group_event(state, event)
+    return state
+
+
+def log_group_event(subject_key, action, actor, group=None):
+    # Added to the caller's session so the event commits with the change it
+    # describes. Callers must flush new groups first so they have an id.
+    event = GroupEvent(
+        subject=subject_key,
+        group_id=group.id if group is not None else None,
+        action=action,
+        actor=actor,
+        payload=json.dumps(group_to_dict(group)) if action in ("create", "edit") else None,
+        created_at=datetime.utcnow(),
+    )
+    db.session.add(event)
+    db.session.flush()
+
+    last_snapshot_event_id = (
+        db.session.query(db.func.max(GroupSnapshot.last_event_id))
+        .filter(GroupSnapshot.subject == subject_key)
+        .scalar()
+        or 0
+    )
+    pending_events = GroupEvent.query.filter(
+        GroupEvent.subject == subject_key,
+        GroupEvent.id > last_snapshot_event_id,
+    ).count()
+    if pending_events >= GROUP_SNAPSHOT_INTERVAL:
+        db.session.add(
+            GroupSnapshot(
+                subject=subject_key,
+                last_event_id=event.id,
+                payload=json.dumps(get_subject_state(subject_key)),
+                created_at=event.created_at,
+            )
+        )
+
+    bump_subject_data_version(subject_key)
+
+
+def bump_subject_data_version(subject_key):
+    # The UPDATE row-locks the subject until commit, so concurrent writers
+    # commit in version order. A max(id) over inserted rows would not: ids
+    # are handed out at insert time, and a lower id can commit last.
+    db.session.execute(
+        update(SubjectAccess)
+        .where(SubjectAccess.subject == subject_key)
+        .values(version=SubjectAccess.version + 1)
+    )
+
+
+def get_subject_data_version(subject_key):
+    # Changes with every committed write to the subject's groups or access
+    # state, in any worker. Read it before the data it keys: a write landing
+    # in between then caches fresh data under the old version, and the next
+    # request misses and re-renders.
+    return (
+        get_read_session()
+        .query(SubjectAccess.version)
+        .filter(SubjectAccess.subject == subject_key)
+        .scalar()
+        or 0
+    )
+
+
+fragment_cache = {}
+
+
+def render_fragment(template_name, cache_key, **context):
+    # FRAGMENT_CACHE_SIZE = 0 turns caching off (used by bench_render.py).
+    if FRAGMENT_CACHE_SIZE <= 0:
+        return Markup(render_template(template_name, **context))
+
+    key = (template_name,) + tuple(cache_key)
+    html = fragment_cache.get(key)
+    if html is None:
+        if len(fragment_cache) >= FRAGMENT_CACHE_SIZE:
+            fragment_cache.clear()
+        html = Markup(render_template(template_name, **context))
+        fragment_cache[key] = html
+    return html
+
+
+def collect_members(form):
+    members = []
+
+    for i in range(1, 5):
+        name = form.get(f"m{i}_name", "").strip()
+        prn = form.get(f"m{i}_prn", "").strip()
+
+        if name and prn:
+            members.append((name, prn))
+    return members
+
+
+def find_invalid_prn(members):
+    for _name, prn in members:
+        if not prn.isdigit() or len(prn) != 12:
+            return f"PRN {prn} must be exactly 12 digits."
+    return None
+
+
+def find_too_long_field(topic, members):
+    # Checked before saving or queueing: PostgreSQL rejects values longer
+    # than the column, which would otherwise surface as a 500.
+    columns = Group.__table__.c
+    if len(topic) > columns.topic.type.length:
+        return f"Topic must be at most {columns.topic.type.length} characters."
+    for name, prn in members:
+        if len(name) > columns.m1_name.type.length:
+            return f"Member names must be at most {columns.m1_name.type.length} characters."
+        if len(prn) > columns.m1_prn.type.length:
+            return f"PRN must be at most {columns.m1_prn.type.length} characters."
+    return None
+
+
+def find_duplicate_topic(topic, groups):
+    for g in groups:
+        if topics_similar(topic, g.topic):
+            return f"Topic already selected by Group #{g.id} in this subject."
+    return None
+
+
+def find_duplicate_member(members, groups):
+    for g in groups:
+        existing_names = [g.m1_name, g.m2_name, g.m3_name, g.m4_name]
+        existing_prns = [g.m1_prn, g.m2_prn, g.m3_prn, g.m4_prn]
+
+        for name, prn in members:
+            if clean_text(prn) in [clean_text(p) for p in existing_prns if p]:
+                return f"PRN {prn} already in Group #{g.id} for this subject."
+
+            if clean_text(name) in [clean_text(n) for n in existing_names if n]:
+                return f"{name} already in Group #{g.id} for this subject."
+    return None
+
+
+def save_group(subject_key, topic, members, submission_token=None):
+    new_group = Group(topic=topic, subject=subject_key)
+
+    for i, (name, prn) in enumerate(members[:4], start=1):
+        setattr(new_group, f"m{i}_name", name)
+        setattr(new_group, f"m{i}_prn", prn)
+
+    db.session.add(new_group)
+    db.session.flush()
+    log_group_event(subject_key, "create", "student", new_group)
+
+    if submission_token:
+        prune_submission_tokens()
+        db.session.add(
+            SubmissionToken(
+                token=submission_token,
+                subject=subject_key,
+                group_id=new_group.id,
+            )
+        )
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent retry with the same token committed first; keep its
+        # group and drop this one.
+        db.session.rollback()
+        if not submission_token or db.session.get(SubmissionToken, submission_token) is None:
+            raise
+
+
 def admin_required_redirect():
     if not session.get("is_admin"):
         return redirect(url_for("admin"))
     return None
 
 
+# ===============================
+# OFFLINE SUBMISSION QUEUE
+# ===============================
+def open_submission_queue():
+    connection = sqlite3.connect(
+        submission_queue_path, timeout=SUBMISSION_QUEUE_LOCK_TIMEOUT, isolation_level=None
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS queued_submissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token VARCHAR(64) UNIQUE,
+            subject VARCHAR(100) NOT NULL,
+            payload TEXT NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            reason TEXT,
+            created_at TEXT NOT NULL,
+            claimed_at REAL
+        )
+        """
+    )
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(queued_submissions)")]
+    if "claimed_at" not in columns:
+        connection.execute("ALTER TABLE queued_submissions ADD COLUMN claimed_at REAL")
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS ix_queued_submissions_status "
+        "ON queued_submissions (status, id)"
+    )
+    return connection
+
+
+def enqueue_submission(subject_key, topic, members, submission_token):
+    # Returns False when the queue is full. The queue lives on disk and is
+    # capped, so an outage cannot grow memory or the file without bound.
+    payload = json.dumps({"topic": topic, "members": members})
+    connection = open_submission_queue()
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        (depth,) = connection.execute(
+            "SELECT COUNT(*) FROM queued_submissions WHERE status IN ('pending', 'applying')"
+        ).fetchone()
+        if depth >= SUBMISSION_QUEUE_MAX_DEPTH:
+            connection.execute("ROLLBACK")
+            return False
+
+        # A retried POST with the same token is only queued once.
+        connection.execute(
+            "INSERT OR IGNORE INTO queued_submissions (token, subject, payload, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            (submission_token, subject_key, payload, datetime.utcnow().isoformat()),
+        )
+        connection.execute("COMMIT")
+        return True
+    finally:
+        connection.close()
+
+
+def get_submission_queue_depth():
+    connection = open_submission_queue()
+    try:
+        rows = connection.execute(
+            "SELECT status, COUNT(*) FROM queued_submissions GROUP BY status"
+        ).fetchall()
+    finally:
+        connection.close()
+
+    depth = {"pending": 0, "applying": 0, "rejected": 0}
+    depth.update(dict(rows))
+    return depth
+
+
+def has_queued_submissions():
+    depth = get_submission_queue_depth()
+    return depth["pending"] + depth["applying"] > 0
+
+
+def get_queued_submission(submission_token):
+    connection = open_submission_queue()
+    try:
+        return connection.execute(
+            "SELECT subject, status, reason FROM queued_submissions WHERE token = ?",
+            (submission_token,),
+        ).fetchone()
+    finally:
+        connection.close()
+
+
+def get_submission_status_message(submission_token):
+    if db.session.get(SubmissionToken, submission_token) is not None:
+        return "Your submission has been saved."
+
+    try:
+        entry = get_queued_submission(submission_token)
+    except sqlite3.Error:
+        entry = None
+    if entry is None:
+        return "No submission was found for this link."
+
+    _subject_key, status, reason = entry
+    if status == "rejected":
+        return f"Your submission could not be saved: {reason}"
+    return "Your submission is queued and will be saved shortly."
+
+
+def apply_queued_submission(subject_key, payload, submission_token):
+    # Same rules as index(); returns the rejection reason, or None once saved.
+    if submission_token and db.session.get(SubmissionToken, submission_token) is not None:
+        return None
+
+    if not get_subject_access_map().get(subject_key, True):
+        return "Closed: Data is not visible because form is closed."
+
+    existing_groups = get_groups_for_subject(subject_key)
+    if len(existing_groups) >= MAX_GROUPS_PER_SUBJECT:
+        return f"Maximum {MAX_GROUPS_PER_SUBJECT} groups allowed for this subject."
+
+    topic = payload["topic"]
+    members = [tuple(member) for member in payload["members"]]
+    reason = find_duplicate_topic(topic, existing_groups) or find_duplicate_member(
+        members, existing_groups
+    )
+    if reason:
+        return reason
+
+    save_group(subject_key, topic, members, submission_token)
+    return None
+
+
+def claim_queued_submission(connection):
+    # Marks the oldest pending entry as 'applying' and returns it, or None if
+    # the queue is empty or another worker is applying an entry right now.
+    # Only one entry is in flight at a time, so entries land in queue order.
+    # A claim older than SUBMISSION_QUEUE_CLAIM_TIMEOUT is from a worker that
+    # died mid-apply and is taken over.
+    now = time.time()
+    stale_before = now - SUBMISSION_QUEUE_CLAIM_TIMEOUT
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        in_flight = connection.execute(
+            "SELECT 1 FROM queued_submissions WHERE status = 'applying' AND claimed_at >= ?",
+            (stale_before,),
+        ).fetchone()
+        row = None
+        if in_flight is None:
+            row = connection.execute(
+                "SELECT id, token, subject, payload FROM queued_submissions "
+                "WHERE status IN ('pending', 'applying') ORDER BY id ASC LIMIT 1"
+            ).fetchone()
+        if row is not None:
+            connection.execute(
+                "UPDATE queued_submissions SET status = 'applying', claimed_at = ? WHERE id = ?",
+                (now, row[0]),
+            )
+        connection.execute("COMMIT")
+        return row
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def drain_submission_queue(limit=None):
+    # Applies queued entries oldest first. The queue is only locked briefly to
+    # claim an entry and to record its outcome, never while the primary is
+    # being called, so students can keep queueing during a slow outage.
+    applied = 0
+    connection = open_submission_queue()
+    try:
+        while limit is None or applied < limit:
+            row = claim_queued_submission(connection)
+            if row is None:
+                return applied
+
+            entry_id, submission_token, subject_key, payload = row
+            try:
+                with app.app_context():
+                    try:
+                        reason = apply_queued_submission(
+                            subject_key, json.loads(payload), submission_token
+                        )
+                    except DATABASE_UNAVAILABLE_ERRORS:
+                        raise
+                    except Exception:
+                        # Anything but an outage will fail the same way on every
+                        # retry, so reject the entry instead of letting it block
+                        # the queue.
+                        db.session.rollback()
+                        app.logger.exception("Queued submission %s could not be saved", entry_id)
+                        reason = "The submission contains data that could not be saved."
+            except BaseException:
+                connection.execute(
+                    "UPDATE queued_submissions SET status = 'pending', claimed_at = NULL "
+                    "WHERE id = ?",
+                    (entry_id,),
+                )
+                raise
+
+            if reason is None:
+                connection.execute("DELETE FROM queued_submissions WHERE id = ?", (entry_id,))
+            else:
+                connection.execute(
+                    "UPDATE queued_submissions SET status = 'rejected', reason = ?, "
+                    "claimed_at = NULL WHERE id = ?",
+                    (reason, entry_id),
+                )
+            applied += 1
+        return applied
+    finally:
+        connection.close()
+
+
+def run_submission_queue_drainer():
+    while True:
+        time.sleep(SUBMISSION_QUEUE_POLL_SECONDS)
+        try:
+            if has_queued_submissions():
+                drain_submission_queue()
+        except DATABASE_UNAVAILABLE_ERRORS:
+            # Still down; try again on the next poll.
+            continue
+        except Exception:
+            app.logger.exception("Submission queue drainer failed")
+
+
+def start_submission_queue_drainer():
+    open_submission_queue().close()
+    threading.Thread(
+        target=run_submission_queue_drainer,
+        name="submission-queue-drainer",
+        daemon=True,
+    ).start()
+
+
+def queue_offline_submission():
+    # The database is unreachable, or older queued entries are still waiting:
+    # run the checks that need no data, queue the submission behind them and
+    # tell the student it will be saved once the queue reaches it.
+    selected_subject_key = get_selected_subject_key()
+    selected_subject = SUBJECTS_BY_KEY[selected_subject_key]
+    topic = request.form.get("topic", "").strip()
+    members = collect_members(request.form)
+    invalid_prn_message = find_invalid_prn(members)
+    too_long_message = find_too_long_field(topic, members)
+    # Forms without a token still get one, so the student can look up the
+    # outcome of the queued entry.
+    submission_token = get_submission_token() or new_submission_token()
+    status = 200
+    status_url = None
+
+    if not topic:
+        popup, message = "invalid_topic", "Topic is required."
+    elif len(members) == 0:
+        popup, message = "invalid_group", "At least 1 member is required."
+    elif invalid_prn_message:
+        popup, message = "invalid_prn", invalid_prn_message
+    elif too_long_message:
+        popup, message = "invalid_length", too_long_message
+    else:
+        try:
+            queued = enqueue_submission(selected_subject_key, topic, members, submission_token)
+        except sqlite3.Error:
+            app.logger.exception("Could not write to the submission queue")
+            queued = False
+
+        if queued:
+            popup = "queued"
+            message = (
+                "Your submission has been received and will be saved shortly. "
+                "Use the status link below to check whether it was saved."
+            )
+            status_url = url_for(
+                "index", subject=selected_subject_key, submission=submission_token
+            )
+        else:
+            popup = "queue_full"
+            message = "Registration is temporarily unavailable. Please try again in a few minutes."
+            status = 503
+
+    subject_access_map = {subject["key"]: True for subject in SUBJECTS}
+    return (
+        render_template(
+            "index.html",
+            popup=popup,
+            message=message,
+            status_url=status_url,
+            selected_subject=selected_subject,
+            selected_subject_key=selected_subject_key,
+            selected_subject_open=True,
+            submission_token=new_submission_token(),
+            header_html=render_fragment(
+                "index_header.html",
+                (selected_subject_key,),
+                selected_subject=selected_subject,
+            ),
+            subject_tabs_html=render_fragment(
+                "index_subject_tabs.html",
+                (selected_subject_key, tuple(sorted(subject_access_map.items()))),
+                subjects=SUBJECTS,
+                selected_subject_key=selected_subject_key,
+                subject_access_map=subject_access_map,
+            ),
+            topics_html="",
+            groups_html="",
+        ),
+        status,
+    )
+
+
+@app.route("/health/queue")
+def submission_queue_health():
+    return jsonify(get_submission_queue_depth())
+
+
 # ===============================
 # STUDENT PAGE
 # ===============================
 @app.route("/", methods=["GET", "POST"])
 def index():
+    try:
+        return handle_index()
+    except DATABASE_UNAVAILABLE_ERRORS:
+        if request.method != "POST":
+            raise
+        db.session.rollback()
+        return queue_offline_submission()
+
+
+def handle_index():
     popup = None
     message = None
 
+    submission_token = None
+    if request.method == "POST":
+        submission_token = get_submission_token()
+        if submission_token:
+            # Retried POST of a form that was already saved: answer with the
+            # original redirect instead of running the checks again.
+            previous = db.session.get(SubmissionToken, submission_token)
+            if previous is not None:
+                mark_primary_write()
+                return redirect(url_for("index", subject=previous.subject))
+
+        # Submissions queued during an outage go first. Apply what can be
+        # applied now; if entries are still waiting, queue this one behind
+        # them so the duplicate rules see submissions in arrival order.
+        try:
+            if has_queued_submissions():
+                drain_submission_queue(limit=SUBMISSION_QUEUE_DRAIN_PER_REQUEST)
+                if has_queued_submissions():
+                    return queue_offline_submission()
+        except sqlite3.Error:
+            app.logger.exception("Could not read the submission queue")
+
+    elif request.args.get("submission"):
+        popup = "submission_status"
+        message = get_submission_status_message(request.args["submission"][:64])
+
     selected_subject_key = get_selected_subject_key()
     selected_subject = SUBJECTS_BY_KEY[selected_subject_key]
+    data_version = get_subject_data_version(selected_subject_key)
     all_groups_for_subject = get_groups_for_subject(selected_subject_key)
     subject_access_map = get_subject_access_map()
     selected_subject_open = subject_access_map.get(selected_subject_key, True)
@@ -284,19 +1084,48 @@ def index():
     submitted_topics = {clean_text(g.topic) for g in existing_groups if g.topic}
 
     def render_index():
+        access_key = tuple(sorted(subject_access_map.items()))
+        header_html = render_fragment(
+            "index_header.html",
+            (selected_subject_key,),
+            selected_subject=selected_subject,
+        )
+        subject_tabs_html = render_fragment(
+            "index_subject_tabs.html",
+            (selected_subject_key, access_key),
+            subjects=SUBJECTS,
+            selected_subject_key=selected_subject_key,
+            subject_access_map=subject_access_map,
+        )
+        topics_html = groups_html = ""
+        if selected_subject_open:
+            topics_html = render_fragment(
+                "index_topics.html",
+                (selected_subject_key, data_version),
+                selected_subject=selected_subject,
+                all_topics=all_topics,
+                submitted_topics=submitted_topics,
+            )
+            groups_html = render_fragment(
+                "index_groups.html",
+                (selected_subject_key, data_version),
+                groups=existing_groups,
+                selected_subject=selected_subject,
+                max_groups_per_subject=MAX_GROUPS_PER_SUBJECT,
+            )
+
         return render_template(
             "index.html",
-            groups=existing_groups,
             popup=popup,
             message=message,
-            all_topics=all_topics,
-            submitted_topics=submitted_topics,
-            subjects=SUBJECTS,
             selected_subject=selected_subject,
             selected_subject_key=selected_subject_key,
-            max_groups_per_subject=MAX_GROUPS_PER_SUBJECT,
             selected_subject_open=selected_subject_open,
-            subject_access_map=subject_access_map,
+            submission_token=new_submission_token(),
+            header_html=header_html,
+            subject_tabs_html=subject_tabs_html,
+            topics_html=topics_html,
+            groups_html=groups_html,
         )
 
     if request.method == "POST":
@@ -319,23 +1148,15 @@ def index():
         # ===============================
         # CHECK DUPLICATE TOPIC
         # ===============================
-        for g in existing_groups:
-            if topics_similar(topic, g.topic):
-                popup = "duplicate_topic"
-                message = f"Topic already selected by Group #{g.id} in this subject."
-                return render_index()
+        message = find_duplicate_topic(topic, existing_groups)
+        if message:
+            popup = "duplicate_topic"
+            return render_index()
 
         # ===============================
         # COLLECT MEMBERS (1-4)
         # ===============================
-        members = []
-
-        for i in range(1, 5):
-            name = request.form.get(f"m{i}_name", "").strip()
-            prn = request.form.get(f"m{i}_prn", "").strip()
-
-            if name and prn:
-                members.append((name, prn))
+        members = collect_members(request.form)
 
         if len(members) == 0:
             popup = "invalid_group"
@@ -345,47 +1166,30 @@ def index():
         # ===============================
         # PRN VALIDATION (12 digits)
         # ===============================
-        for _name, prn in members:
-            if not prn.isdigit() or len(prn) != 12:
-                popup = "invalid_prn"
-                message = f"PRN {prn} must be exactly 12 digits."
-                return render_index()
+        message = find_invalid_prn(members)
+        if message:
+            popup = "invalid_prn"
+            return render_index()
+
+        message = find_too_long_field(topic, members)
+        if message:
+            popup = "invalid_length"
+            return render_index()
 
         # ===============================
         # CHECK DUPLICATE MEMBERS
         # ===============================
-        for g in existing_groups:
-            existing_names = [g.m1_name, g.m2_name, g.m3_name, g.m4_name]
-            existing_prns = [g.m1_prn, g.m2_prn, g.m3_prn, g.m4_prn]
-
-            for name, prn in members:
-                if clean_text(prn) in [clean_text(p) for p in existing_prns if p]:
-                    popup = "duplicate_user"
-                    message = f"PRN {prn} already in Group #{g.id} for this subject."
-                    return render_index()
-
-                if clean_text(name) in [clean_text(n) for n in existing_names if n]:
-                    popup = "duplicate_user"
-                    message = f"{name} already in Group #{g.id} for this subject."
-                    return render_index()
+        message = find_duplicate_member(members, existing_groups)
+        if message:
+            popup = "duplicate_user"
+            return render_index()
 
         # ===============================
         # SAVE GROUP
         # ===============================
-        new_group = Group(topic=topic, subject=selected_subject_key)
-
-        if len(members) >= 1:
-            new_group.m1_name, new_group.m1_prn = members[0]
-        if len(members) >= 2:
-            new_group.m2_name, new_group.m2_prn = members[1]
-        if len(members) >= 3:
-            new_group.m3_name, new_group.m3_prn = members[2]
-        if len(members) >= 4:
-            new_group.m4_name, new_group.m4_prn = members[3]
-
-        db.session.add(new_group)
-        db.session.commit()
+        save_group(selected_subject_key, topic, members, submission_token)
 
+        mark_primary_write()
         return redirect(url_for("index", subject=selected_subject_key))
 
     return render_index()
@@ -415,23 +1219,40 @@ def admin():
             db.session.add(subject_access)
         else:
             subject_access.is_open = is_open
+        log_group_event(subject_key, "open" if is_open else "close", "admin")
         db.session.commit()
+        mark_primary_write()
 
         return redirect(url_for("admin", subject=subject_key))
 
     selected_subject_key = get_selected_subject_key()
+    data_version = get_subject_data_version(selected_subject_key)
     groups = get_groups_for_subject(selected_subject_key)
     subject_access_map = get_subject_access_map()
     subject_is_open = subject_access_map.get(selected_subject_key, True)
 
+    subject_options_html = render_fragment(
+        "admin_subject_options.html",
+        (selected_subject_key, tuple(sorted(subject_access_map.items()))),
+        subjects=SUBJECTS,
+        selected_subject_key=selected_subject_key,
+        subject_access_map=subject_access_map,
+    )
+    group_rows_html = render_fragment(
+        "admin_group_rows.html",
+        (selected_subject_key, data_version),
+        groups=groups,
+        selected_subject_key=selected_subject_key,
+    )
+
     return render_template(
         "admin.html",
         groups=groups,
-        subjects=SUBJECTS,
         selected_subject_key=selected_subject_key,
         selected_subject=SUBJECTS_BY_KEY[selected_subject_key],
-        subject_access_map=subject_access_map,
         subject_is_open=subject_is_open,
+        subject_options_html=subject_options_html,
+        group_rows_html=group_rows_html,
     )
 
 
@@ -454,6 +1275,7 @@ def edit_group(group_id):
 
     if request.method == "POST":
         selected_subject_key = normalize_subject_key(request.form.get("subject") or group.subject)
+        previous_subject_key = group.subject
         topic = request.form.get("topic", "").strip()
 
         if topic:
@@ -466,7 +1288,11 @@ def edit_group(group_id):
             setattr(group, f"m{i}_name", name or None)
             setattr(group, f"m{i}_prn", prn or None)
 
+        if previous_subject_key != selected_subject_key:
+            log_group_event(previous_subject_key, "move_out", "admin", group)
+        log_group_event(selected_subject_key, "edit", "admin", group)
         db.session.commit()
+        mark_primary_write()
         return redirect(url_for("admin", subject=selected_subject_key))
 
     selected_subject_key = normalize_subject_key(request.args.get("subject") or group.subject)
@@ -486,11 +1312,60 @@ def delete_group(group_id):
 
     group = Group.query.get_or_404(group_id)
     selected_subject_key = normalize_subject_key(request.form.get("subject") or group.subject)
+    log_group_event(group.subject, "delete", "admin", group)
     db.session.delete(group)
     db.session.commit()
+    mark_primary_write()
     return redirect(url_for("admin", subject=selected_subject_key))
 
 
+# ===============================
+# ADMIN HISTORY
+# ===============================
+@app.route("/admin/history")
+def group_history():
+    admin_redirect = admin_required_redirect()
+    if admin_redirect:
+        return admin_redirect
+
+    selected_subject_key = get_selected_subject_key()
+    at = None
+    raw_at = (request.args.get("at") or "").strip()
+    if raw_at:
+        # ISO 8601; times without a UTC offset are taken as UTC.
+        try:
+            at = datetime.fromisoformat(raw_at)
+        except ValueError:
+            abort(400)
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    state = get_subject_state(selected_subject_key, at)
+    if state is None:
+        first_snapshot_at = (
+            db.session.query(db.func.min(GroupSnapshot.created_at))
+            .filter(GroupSnapshot.subject == selected_subject_key)
+            .scalar()
+        )
+        return (
+            jsonify(
+                error=f"No history before {first_snapshot_at.isoformat()} UTC.",
+                subject=selected_subject_key,
+            ),
+            400,
+        )
+    groups = [
+        {"id": int(group_id), **fields}
+        for group_id, fields in sorted(state["groups"].items(), key=lambda item: int(item[0]))
+    ]
+    return jsonify(
+        subject=selected_subject_key,
+        at=at.isoformat() + "Z" if at else None,
+        is_open=state["is_open"],
+        groups=groups,
+    )
+
+
 # ===============================
 # DOWNLOAD EXCEL (CIA FORMAT STYLE)
 # ===============================
@@ -673,126 +1548,179 @@ def download_excel():
 
 
 # ===============================
-# DOWNLOAD PDF
+# PDF RENDERING
 # ===============================
-@app.route("/download_pdf")
-def download_pdf():
-    admin_redirect = admin_required_redirect()
-    if admin_redirect:
-        return admin_redirect
-
-    selected_subject_key = get_selected_subject_key()
-    selected_subject = SUBJECTS_BY_KEY[selected_subject_key]
-    groups = get_groups_for_subject(selected_subject_key)
-
-    safe_subject = selected_subject_key.replace("-", "_")
-    file_path = f"groups_{safe_subject}.pdf"
-    doc = SimpleDocTemplate(file_path, pagesize=A4)
+PDF_TABLE_BODY_STYLE = [
+    ("GRID", (0, 0), (-1, -1), 1, colors.black),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+    ("LEFTPADDING", (0, 0), (-1, -1), 6),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+    ("TOPPADDING", (0, 0), (-1, -1), 6),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
+]
 
-    from reportlab.platypus import Paragraph, Spacer, TableStyle
-    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-    from reportlab.lib import colors
 
-    elements = []
+@lru_cache(maxsize=None)
+def get_pdf_styles():
+    # getSampleStyleSheet() builds a fresh stylesheet on every call, so the
+    # derived styles are created once per process and reused for every export.
     styles = getSampleStyleSheet()
+    return {
+        "university": ParagraphStyle(
+            "UniversityStyle",
+            parent=styles["Title"],
+            alignment=1,
+            fontSize=18,
+            spaceAfter=10,
+        ),
+        "normal_center": ParagraphStyle(
+            "NormalCenter",
+            parent=styles["Normal"],
+            alignment=1,
+            fontSize=12,
+        ),
+        "main_heading": ParagraphStyle(
+            "MainHeading",
+            parent=styles["Heading1"],
+            alignment=1,
+            fontSize=20,
+            spaceBefore=15,
+            spaceAfter=20,
+        ),
+        "table": TableStyle(
+            [
+                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
+                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+            ]
+            + PDF_TABLE_BODY_STYLE
+        ),
+        # Continuation chunks have no header row to colour.
+        "table_body": TableStyle(PDF_TABLE_BODY_STYLE),
+    }
+
+
+def group_pdf_row(sr, group):
+    prns = []
+    names = []
+    for i in range(1, 5):
+        prn = getattr(group, f"m{i}_prn")
+        name = getattr(group, f"m{i}_name")
+        if prn:
+            prns.append(f"{i}) {prn}")
+        if name:
+            names.append(name)
+
+    return [f"{sr})", "\n".join(prns), "\n".join(names), group.topic or ""]
+
+
+def make_pdf_table(rows, style):
+    table = Table(rows, colWidths=PDF_COLUMN_WIDTHS)
+    table.setStyle(style)
+    return table
+
+
+class ChunkedDocTemplate(SimpleDocTemplate):
+    # SimpleDocTemplate.build() needs every flowable up front. build_chunks()
+    # lays out one batch of flowables at a time, so a batch is only created
+    # when the previous one has been drawn and can be freed.
+    #
+    # This mirrors BaseDocTemplate.build() and relies on its private hooks
+    # (_startBuild, handle_flowable, clean_hanging, _savedInfo, _endBuild) as
+    # they are in the reportlab version pinned in requirements.txt (4.4.10).
+    # Re-check it against reportlab's build() before changing that pin.
+    def build_chunks(self, chunks):
+        self._calc()
+        frame = Frame(self.leftMargin, self.bottomMargin, self.width, self.height, id="normal")
+        self.addPageTemplates(
+            [
+                PageTemplate(id="First", frames=frame, pagesize=self.pagesize),
+                PageTemplate(id="Later", frames=frame, pagesize=self.pagesize),
+            ]
+        )
 
-    elements.append(Spacer(1, 40))
+        self._startBuild()
+        canv = self.canv
+        self._savedInfo = canv._doc.info
+        canv._doctemplate = self
+        try:
+            for flowables in chunks:
+                while flowables:
+                    self.clean_hanging()
+                    self.handle_flowable(flowables)
+        finally:
+            del canv._doctemplate
+        canv._doc.info = self._savedInfo
+        self._endBuild()
+
+
+def iter_group_pdf_chunks(subject, groups, styles):
+    yield [
+        Spacer(1, 40),
+        Paragraph("<b>Sandip University, Nashik (MS), India</b>", styles["university"]),
+        Spacer(1, 8),
+        Paragraph("Program: B.Tech CSE", styles["normal_center"]),
+        Spacer(1, 5),
+        Paragraph("Sem IV | Div A", styles["normal_center"]),
+        Spacer(1, 5),
+        Paragraph(f"Subject: {subject['name']}", styles["normal_center"]),
+        Spacer(1, 5),
+        Paragraph(f"Faculty: {subject['faculty']}", styles["normal_center"]),
+        Spacer(1, 25),
+        Paragraph("<b>Mini Project List</b>", styles["main_heading"]),
+        Spacer(1, 15),
+    ]
 
-    university_style = ParagraphStyle(
-        "UniversityStyle",
-        parent=styles["Title"],
-        alignment=1,
-        fontSize=18,
-        spaceAfter=10,
-    )
+    # One Table per chunk keeps layout cost linear: platypus re-measures every
+    # remaining row each time a single large table is split across pages.
+    # Only the first chunk has the header row; later chunks use the same
+    # column widths and grid, so they join up into one table as before.
+    rows = [["Sr.no", "PRN No", "Project group members", "Project title"]]
+    style = styles["table"]
+    sr = 0
+    for sr, g in enumerate(groups, start=1):
+        rows.append(group_pdf_row(sr, g))
+        if len(rows) >= PDF_TABLE_CHUNK_SIZE:
+            yield [make_pdf_table(rows, style)]
+            rows = []
+            style = styles["table_body"]
+    if rows:
+        yield [make_pdf_table(rows, style)]
 
-    normal_center = ParagraphStyle(
-        "NormalCenter",
-        parent=styles["Normal"],
-        alignment=1,
-        fontSize=12,
-    )
 
-    main_heading = ParagraphStyle(
-        "MainHeading",
-        parent=styles["Heading1"],
-        alignment=1,
-        fontSize=20,
-        spaceBefore=15,
-        spaceAfter=20,
-    )
+def build_groups_pdf(subject, groups, output):
+    # Writes the group list to `output`, a path or a binary file object.
+    # `groups` may be any iterable; it is consumed one chunk at a time.
+    doc = ChunkedDocTemplate(output, pagesize=A4)
+    doc.build_chunks(iter_group_pdf_chunks(subject, groups, get_pdf_styles()))
 
-    elements.append(Paragraph("<b>Sandip University, Nashik (MS), India</b>", university_style))
-    elements.append(Spacer(1, 8))
-    elements.append(Paragraph("Program: B.Tech CSE", normal_center))
-    elements.append(Spacer(1, 5))
-    elements.append(Paragraph("Sem IV | Div A", normal_center))
-    elements.append(Spacer(1, 5))
-    elements.append(Paragraph(f"Subject: {selected_subject['name']}", normal_center))
-    elements.append(Spacer(1, 5))
-    elements.append(Paragraph(f"Faculty: {selected_subject['faculty']}", normal_center))
-    elements.append(Spacer(1, 25))
-    elements.append(Paragraph("<b>Mini Project List</b>", main_heading))
-    elements.append(Spacer(1, 15))
-
-    data = [["Sr.no", "PRN No", "Project group members", "Project title"]]
 
-    for sr, g in enumerate(groups, start=1):
-        prns = []
-        names = []
-
-        if g.m1_prn:
-            prns.append(f"1) {g.m1_prn}")
-        if g.m2_prn:
-            prns.append(f"2) {g.m2_prn}")
-        if g.m3_prn:
-            prns.append(f"3) {g.m3_prn}")
-        if g.m4_prn:
-            prns.append(f"4) {g.m4_prn}")
-
-        if g.m1_name:
-            names.append(g.m1_name)
-        if g.m2_name:
-            names.append(g.m2_name)
-        if g.m3_name:
-            names.append(g.m3_name)
-        if g.m4_name:
-            names.append(g.m4_name)
-
-        data.append(
-            [
-                f"{sr})",
-                "\n".join(prns),
-                "\n".join(names),
-                g.topic or "",
-            ]
-        )
+# ===============================
+# DOWNLOAD PDF
+# ===============================
+@app.route("/download_pdf")
+def download_pdf():
+    admin_redirect = admin_required_redirect()
+    if admin_redirect:
+        return admin_redirect
 
-    table = Table(data, colWidths=[40, 120, 160, 150])
-    table.setStyle(
-        TableStyle(
-            [
-                ("BACKGROUND", (0, 0), (-1, 0), colors.grey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-                ("GRID", (0, 0), (-1, -1), 1, colors.black),
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-                ("TOPPADDING", (0, 0), (-1, -1), 6),
-                ("BOTTOMPADDING", (0, 0), (-1, -1), 6),
-            ]
-        )
-    )
-    elements.append(table)
+    selected_subject_key = get_selected_subject_key()
+    selected_subject = SUBJECTS_BY_KEY[selected_subject_key]
+    groups = iter_groups_for_subject(selected_subject_key, PDF_TABLE_CHUNK_SIZE)
 
-    doc.build(elements)
+    buffer = io.BytesIO()
+    build_groups_pdf(selected_subject, groups, buffer)
+    buffer.seek(0)
 
     return send_file(
-        file_path,
+        buffer,
+        mimetype="application/pdf",
         as_attachment=True,
         download_name=f"{selected_subject['name']} Groups.pdf",
     )
 
 
+start_submission_queue_drainer()
+
+
 if __name__ == "__main__":
     app.run(debug=True)
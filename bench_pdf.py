@@ -0,0 +1,55 @@
+"""Time the group list PDF export for large, department-wide lists.
+
+Usage: python bench_pdf.py [group counts...]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+_db_dir = tempfile.mkdtemp(prefix="bench_pdf_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_db_dir, "bench.db")
+
+import app  # noqa: E402
+
+
+def iter_groups(count):
+    # Generated on demand, like rows streamed from the database.
+    for i in range(count):
+        fields = {"topic": f"Mini Project Topic Number {i}"}
+        for m in range(1, 5):
+            fields[f"m{m}_name"] = f"Student {i}-{m}"
+            fields[f"m{m}_prn"] = f"{i:08d}{m:04d}"
+        yield SimpleNamespace(**fields)
+
+
+def time_export(count):
+    buffer = io.BytesIO()
+    tracemalloc.start()
+    start = time.perf_counter()
+    app.build_groups_pdf(app.SUBJECTS[0], iter_groups(count), buffer)
+    elapsed = time.perf_counter() - start
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), buffer.tell() / 1024
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000]
+    chunk_size = app.PDF_TABLE_CHUNK_SIZE
+    for count in counts:
+        for label, size in [("chunked", chunk_size), ("single", count + 1)]:
+            app.PDF_TABLE_CHUNK_SIZE = size
+            elapsed, peak_mb, size_kb = time_export(count)
+            print(
+                f"{count:>6} groups  {label:<8} {elapsed:8.2f} s  "
+                f"peak {peak_mb:7.1f} MiB  pdf {size_kb:8.0f} KiB"
+            )
+        app.PDF_TABLE_CHUNK_SIZE = chunk_size
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Time student and admin page renders against a throwaway SQLite database.
+
+Each page is timed with the fragment cache on and off. "request" is the
+whole GET, including database queries; "render" is template time only.
+
+Usage: python bench_render.py [requests]
+"""
+import os
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench_render_")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_db_dir, "bench.db")
+
+from flask import before_render_template, template_rendered  # noqa: E402
+
+import app as app_module  # noqa: E402
+from app import MAX_GROUPS_PER_SUBJECT, SUBJECTS, app  # noqa: E402
+
+render_clock = {"depth": 0, "started": 0.0, "total": 0.0}
+
+
+def _render_started(sender, **extra):
+    if render_clock["depth"] == 0:
+        render_clock["started"] = time.perf_counter()
+    render_clock["depth"] += 1
+
+
+def _render_finished(sender, **extra):
+    render_clock["depth"] -= 1
+    if render_clock["depth"] == 0:
+        render_clock["total"] += time.perf_counter() - render_clock["started"]
+
+
+before_render_template.connect(_render_started, app)
+template_rendered.connect(_render_finished, app)
+
+
+def seed_groups(client, subject):
+    for i, topic in enumerate(subject["topics"][:MAX_GROUPS_PER_SUBJECT]):
+        client.post(
+            "/",
+            data={
+                "subject": subject["key"],
+                "topic": topic,
+                "m1_name": f"Student {i} A",
+                "m1_prn": f"{i:06d}000001",
+                "m2_name": f"Student {i} B",
+                "m2_prn": f"{i:06d}000002",
+            },
+        )
+
+
+def time_requests(client, path, count):
+    client.get(path)
+    render_clock["total"] = 0.0
+    start = time.perf_counter()
+    for _ in range(count):
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+    request_ms = (time.perf_counter() - start) / count * 1000
+    render_ms = render_clock["total"] / count * 1000
+    return request_ms, render_ms
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    client = app.test_client()
+    for subject in SUBJECTS:
+        seed_groups(client, subject)
+    with client.session_transaction() as flask_session:
+        flask_session["is_admin"] = True
+
+    cache_size = app_module.FRAGMENT_CACHE_SIZE
+    print(
+        f"{'page':<6} {'subject':<28} "
+        f"{'cached request':>15} {'render':>9}   {'uncached request':>17} {'render':>9}"
+    )
+    for subject in SUBJECTS:
+        for label, path in [
+            ("index", f"/?subject={subject['key']}"),
+            ("admin", f"/admin?subject={subject['key']}"),
+        ]:
+            app_module.FRAGMENT_CACHE_SIZE = cache_size
+            cached = time_requests(client, path, count)
+            app_module.FRAGMENT_CACHE_SIZE = 0
+            uncached = time_requests(client, path, count)
+            print(
+                f"{label:<6} {subject['key']:<28} "
+                f"{cached[0]:12.3f} ms {cached[1]:6.3f} ms   "
+                f"{uncached[0]:14.3f} ms {uncached[1]:6.3f} ms"
+            )
+    app_module.FRAGMENT_CACHE_SIZE = cache_size
+
+
+if __name__ == "__main__":
+    main()